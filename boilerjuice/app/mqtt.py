@@ -11,9 +11,10 @@ State topic:
   boilerjuice/tank/state
 """
 
+import asyncio
 import json
 import logging
-import time
+import threading
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -33,10 +34,32 @@ except ImportError:
     PAHO_V2 = False
     logger.warning("paho-mqtt not installed — MQTT integration disabled")
 
+# Prefer orjson (C, returns bytes) for payload serialisation
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 
 DISCOVERY_PREFIX = "homeassistant"
 STATE_TOPIC = "boilerjuice/tank/state"
 AVAILABILITY_TOPIC = "boilerjuice/tank/availability"
+# Home Assistant publishes "online" here when it (re)starts
+HA_STATUS_TOPIC = f"{DISCOVERY_PREFIX}/status"
+
+# The publisher's client id; the connection test uses its own so it
+# doesn't kick the publisher's session off the broker
+CLIENT_ID = "boilerjuice-addon"
+TEST_CLIENT_ID = "boilerjuice-addon-test"
+
+# QoS 1 messages allowed unacknowledged at once, and how long to wait
+# for a PUBACK before giving up on a publish
+MAX_INFLIGHT = 20
+PUBLISH_TIMEOUT = 10
 
 # Sensor definitions for auto-discovery
 SENSORS = [
@@ -79,34 +102,85 @@ DEVICE_INFO = {
 }
 
 
-def _get_mqtt_client(config: dict) -> Optional["mqtt_client.Client"]:
-    """Create and connect an MQTT client from config."""
+def _build_discovery_messages() -> list:
+    """Serialise the (static) discovery config for every sensor once."""
+    messages = []
+    for sensor in SENSORS:
+        discovery_topic = (
+            f"{DISCOVERY_PREFIX}/sensor/boilerjuice/"
+            f"{sensor['object_id']}/config"
+        )
+
+        payload = {
+            "name": sensor["name"],
+            "unique_id": f"boilerjuice_{sensor['object_id']}",
+            "object_id": f"boilerjuice_{sensor['object_id']}",
+            "state_topic": STATE_TOPIC,
+            "value_template": f"{{{{ value_json.{sensor['value_key']} }}}}",
+            "unit_of_measurement": sensor["unit"],
+            "icon": sensor["icon"],
+            "device": DEVICE_INFO,
+            "availability_topic": AVAILABILITY_TOPIC,
+            "payload_available": "online",
+            "payload_not_available": "offline",
+        }
+
+        if sensor["device_class"]:
+            payload["device_class"] = sensor["device_class"]
+        if sensor["state_class"]:
+            payload["state_class"] = sensor["state_class"]
+
+        messages.append((discovery_topic, _dumps(payload)))
+    return messages
+
+
+# (topic, payload bytes) for each sensor's discovery config
+_DISCOVERY_MESSAGES = _build_discovery_messages()
+
+# Pre-encoded availability payloads
+_ONLINE = b"online"
+_OFFLINE = b"offline"
+
+
+def _create_mqtt_client(config: dict, client_id: str = CLIENT_ID) -> Optional["mqtt_client.Client"]:
+    """Construct an (unconnected) MQTT client from config."""
     if not MQTT_AVAILABLE:
         logger.error("paho-mqtt not installed")
         return None
 
-    host = config.get("mqtt_host", "core-mosquitto")
-    port = int(config.get("mqtt_port", 1883))
     user = config.get("mqtt_user", "")
     password = config.get("mqtt_password", "")
 
-    try:
-        # paho-mqtt 2.x requires CallbackAPIVersion
-        if PAHO_V2:
-            client = mqtt_client.Client(
-                callback_api_version=CallbackAPIVersion.VERSION2,
-                client_id="boilerjuice-addon",
-                protocol=mqtt_client.MQTTv311,
-            )
-        else:
-            client = mqtt_client.Client(
-                client_id="boilerjuice-addon",
-                protocol=mqtt_client.MQTTv311,
-            )
+    # paho-mqtt 2.x requires CallbackAPIVersion
+    if PAHO_V2:
+        client = mqtt_client.Client(
+            callback_api_version=CallbackAPIVersion.VERSION2,
+            client_id=client_id,
+            protocol=mqtt_client.MQTTv311,
+        )
+    else:
+        client = mqtt_client.Client(
+            client_id=client_id,
+            protocol=mqtt_client.MQTTv311,
+        )
+
+    if user:
+        client.username_pw_set(user, password)
+
+    # Allow a full discovery batch to be in flight without queueing
+    client.max_inflight_messages_set(MAX_INFLIGHT)
+    return client
 
-        if user:
-            client.username_pw_set(user, password)
 
+def _get_mqtt_client(config: dict, client_id: str = CLIENT_ID) -> Optional["mqtt_client.Client"]:
+    """Create and connect an MQTT client from config (blocking connect)."""
+    host = config.get("mqtt_host", "core-mosquitto")
+    port = int(config.get("mqtt_port", 1883))
+
+    try:
+        client = _create_mqtt_client(config, client_id)
+        if not client:
+            return None
         client.connect(host, port, keepalive=60)
         # Start the network loop so QoS 1 publishes are actually sent
         client.loop_start()
@@ -117,125 +191,256 @@ def _get_mqtt_client(config: dict) -> Optional["mqtt_client.Client"]:
         return None
 
 
+def _connection_key(config: dict) -> tuple:
+    """Broker settings that require a new client when changed."""
+    return (
+        config.get("mqtt_host", "core-mosquitto"),
+        int(config.get("mqtt_port", 1883)),
+        config.get("mqtt_user", ""),
+        config.get("mqtt_password", ""),
+    )
+
+
 def _disconnect(client):
-    """Cleanly stop the network loop and disconnect."""
+    """Cleanly disconnect and stop the network loop.
+
+    Publishes that must reach the broker are already confirmed via
+    wait_for_publish(), so no settling delay is needed here.  The loop
+    is stopped after disconnect() so it can flush the DISCONNECT packet.
+    """
     try:
-        # Give a moment for queued messages to be sent
-        time.sleep(0.5)
-        client.loop_stop()
         client.disconnect()
+        client.loop_stop()
     except Exception:
         pass
 
 
-def publish_discovery(config: dict):
-    """
-    Publish MQTT auto-discovery config messages for all sensors.
-    Call this once at startup or when MQTT settings change.
-    """
-    client = _get_mqtt_client(config)
-    if not client:
-        return False
+class MqttPublisher:
+    """One persistent broker connection shared by discovery and state.
 
-    try:
-        for sensor in SENSORS:
-            discovery_topic = (
-                f"{DISCOVERY_PREFIX}/sensor/boilerjuice/"
-                f"{sensor['object_id']}/config"
-            )
+    The client is created lazily on first publish and connects in the
+    background: paho's network loop thread performs the handshake and
+    any later reconnects, queueing QoS 1 publishes until the broker is
+    reachable.  It is rebuilt only when the broker settings change.
+    Discovery is sent once per connection.
+    """
 
-            payload = {
-                "name": sensor["name"],
-                "unique_id": f"boilerjuice_{sensor['object_id']}",
-                "object_id": f"boilerjuice_{sensor['object_id']}",
-                "state_topic": STATE_TOPIC,
-                "value_template": f"{{{{ value_json.{sensor['value_key']} }}}}",
-                "unit_of_measurement": sensor["unit"],
-                "icon": sensor["icon"],
-                "device": DEVICE_INFO,
-                "availability_topic": AVAILABILITY_TOPIC,
-                "payload_available": "online",
-                "payload_not_available": "offline",
-            }
-
-            if sensor["device_class"]:
-                payload["device_class"] = sensor["device_class"]
-            if sensor["state_class"]:
-                payload["state_class"] = sensor["state_class"]
-
-            result = client.publish(
-                discovery_topic,
-                json.dumps(payload),
+    __slots__ = (
+        "client", "_key", "_lock", "_connected", "_discovery_sent",
+    )
+
+    def __init__(self):
+        self.client: Optional["mqtt_client.Client"] = None
+        self._key: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self._connected = threading.Event()
+        self._discovery_sent = False
+
+    def _on_connect(self, client, userdata, flags, reason_code, *args):
+        """Watch for HA restarts on every (re)connect."""
+        if getattr(reason_code, "is_failure", reason_code != 0):
+            logger.error("MQTT connection refused: %s", reason_code)
+            return
+        logger.info("MQTT connected")
+        # Clear the retained "offline" will a dropped connection left behind
+        client.publish(AVAILABILITY_TOPIC, _ONLINE, retain=True, qos=1)
+        self._connected.set()
+        client.subscribe(HA_STATUS_TOPIC, 0)
+
+    def _on_message(self, client, userdata, msg):
+        if msg.topic == HA_STATUS_TOPIC and msg.payload == _ONLINE:
+            # HA restarted — it may have lost our config, so resend it now.
+            # This runs on paho's network thread, so queue without waiting;
+            # the next state publish confirms it with PUBACKs
+            logger.info("Home Assistant restarted — resending MQTT discovery")
+            self._discovery_sent = False
+            for topic, payload in _DISCOVERY_MESSAGES:
+                client.publish(topic, payload, retain=True, qos=1)
+
+    def _on_disconnect(self, client, userdata, *args):
+        """Resend discovery once paho has reconnected."""
+        if client is self.client:
+            self._connected.clear()
+            self._discovery_sent = False
+        logger.info("MQTT disconnected")
+
+    def _ensure_client(self, config: dict) -> Optional["mqtt_client.Client"]:
+        """Return the shared client, starting the connection on first use."""
+        key = _connection_key(config)
+        with self._lock:
+            if self.client is not None and self._key == key:
+                return self.client
+
+            self._close_locked()
+
+            try:
+                client = _create_mqtt_client(config)
+                if not client:
+                    return None
+                # The broker marks the sensors offline for us if the connection dies
+                client.will_set(AVAILABILITY_TOPIC, _OFFLINE, qos=1, retain=True)
+                client.on_connect = self._on_connect
+                client.on_disconnect = self._on_disconnect
+                client.on_message = self._on_message
+                client.reconnect_delay_set(min_delay=1, max_delay=30)
+                client.connect_async(key[0], key[1], keepalive=60)
+                client.loop_start()
+            except Exception as e:
+                logger.error("MQTT connection failed: %s", e)
+                return None
+
+            self.client, self._key = client, key
+            return client
+
+    def _close_locked(self):
+        if self.client is not None:
+            old, self.client = self.client, None
+            # A clean disconnect doesn't fire the will, so mark the sensors
+            # offline ourselves
+            if self._connected.is_set():
+                try:
+                    result = old.publish(AVAILABILITY_TOPIC, _OFFLINE, retain=True, qos=1)
+                    result.wait_for_publish(timeout=PUBLISH_TIMEOUT)
+                except Exception as e:
+                    logger.warning("MQTT offline publish failed: %s", e)
+            self._connected.clear()
+            self._discovery_sent = False
+            _disconnect(old)
+
+    def publish_discovery(self, config: dict) -> bool:
+        """Publish auto-discovery config messages for all sensors."""
+        client = self._ensure_client(config)
+        if not client:
+            return False
+        # Give a fresh connection a moment to come up so the PUBACKs
+        # below can actually be waited on
+        if not self._connected.wait(PUBLISH_TIMEOUT):
+            logger.error("MQTT discovery skipped: broker not connected")
+            return False
+
+        try:
+            # Queue every discovery message up front so they share the
+            # round-trips, then wait for all the PUBACKs
+            pending = [
+                (topic, client.publish(topic, payload, retain=True, qos=1))
+                for topic, payload in _DISCOVERY_MESSAGES
+            ]
+            # Availability is a retained beacon backed by the LWT, so it
+            # doesn't need a PUBACK
+            client.publish(AVAILABILITY_TOPIC, _ONLINE, retain=True, qos=0)
+            for topic, result in pending:
+                result.wait_for_publish(timeout=PUBLISH_TIMEOUT)
+                logger.info("Published discovery: %s (rc=%s)", topic, result.rc)
+
+            unacked = [topic for topic, result in pending if not result.is_published()]
+            if unacked:
+                # Leave _discovery_sent unset so the next publish retries
+                logger.error("MQTT discovery not acknowledged for: %s", ", ".join(unacked))
+                return False
+
+            self._discovery_sent = True
+            logger.info("MQTT auto-discovery published successfully")
+            return True
+
+        except Exception as e:
+            logger.error("MQTT discovery publish failed: %s", e)
+            return False
+
+    def ensure_discovery(self, config: dict) -> bool:
+        """Publish discovery unless it was already sent on this connection."""
+        if self._discovery_sent and self.client is not None:
+            return True
+        return self.publish_discovery(config)
+
+    def publish_state(self, config: dict, data: dict) -> bool:
+        """Publish tank state (and discovery first, if needed)."""
+        # Settle the client first: a broker change replaces it and resets
+        # _discovery_sent, so discovery can only be judged afterwards
+        client = self._ensure_client(config)
+        if not client:
+            return False
+        if not self._connected.wait(PUBLISH_TIMEOUT):
+            logger.error("MQTT data publish skipped: broker not connected")
+            return False
+
+        self.ensure_discovery(config)
+
+        try:
+            # Publish state — the network loop thread delivers it
+            info = client.publish(
+                STATE_TOPIC,
+                _dumps(data),
                 retain=True,
                 qos=1,
             )
-            result.wait_for_publish()
-            logger.info("Published discovery: %s (rc=%s)", discovery_topic, result.rc)
+            if info.rc != mqtt_client.MQTT_ERR_SUCCESS:
+                # e.g. MQTT_ERR_NO_CONN: broker unreachable or login refused
+                logger.error("MQTT data publish failed: %s",
+                             mqtt_client.error_string(info.rc))
+                return False
 
-        # Publish availability
-        result = client.publish(AVAILABILITY_TOPIC, "online", retain=True, qos=1)
-        result.wait_for_publish()
+            # Update availability (fire-and-forget)
+            client.publish(AVAILABILITY_TOPIC, _ONLINE, retain=True, qos=0)
 
-        _disconnect(client)
-        logger.info("MQTT auto-discovery published successfully")
-        return True
+            logger.info("MQTT tank data published")
+            return True
+
+        except Exception as e:
+            logger.error("MQTT data publish failed: %s", e)
+            return False
+
+    def publish_offline(self, config: dict):
+        """Mark the sensor as offline."""
+        client = self._ensure_client(config)
+        if not client:
+            return
+        try:
+            result = client.publish(AVAILABILITY_TOPIC, _OFFLINE, retain=True, qos=1)
+            result.wait_for_publish(timeout=PUBLISH_TIMEOUT)
+        except Exception:
+            pass
+
+    def close(self):
+        """Disconnect from the broker."""
+        with self._lock:
+            self._close_locked()
 
-    except Exception as e:
-        logger.error("MQTT discovery publish failed: %s", e)
-        _disconnect(client)
-        return False
+
+_publisher = MqttPublisher()
+
+
+def publish_discovery(config: dict):
+    """
+    Publish MQTT auto-discovery config messages for all sensors.
+    Call this once at startup or when MQTT settings change.
+    """
+    return _publisher.publish_discovery(config)
 
 
 def publish_tank_data(config: dict, data: dict):
     """
-    Publish discovery config (if not yet done) and tank state data.
+    Publish discovery config (once per connection) and tank state data.
     Called after each successful data fetch.
     """
     if not config.get("mqtt_enabled"):
+        # MQTT was switched off — mark the sensors offline and disconnect
+        _publisher.close()
         return
+    return _publisher.publish_state(config, data)
 
-    # Always publish discovery first to ensure HA knows about our sensors
-    publish_discovery(config)
-
-    client = _get_mqtt_client(config)
-    if not client:
-        return False
 
-    try:
-        # Publish state
-        result = client.publish(
-            STATE_TOPIC,
-            json.dumps(data),
-            retain=True,
-            qos=1,
-        )
-        result.wait_for_publish()
-
-        # Update availability
-        result = client.publish(AVAILABILITY_TOPIC, "online", retain=True, qos=1)
-        result.wait_for_publish()
-
-        _disconnect(client)
-        logger.info("MQTT tank data published")
-        return True
+def publish_offline(config: dict):
+    """Mark the sensor as offline."""
+    _publisher.publish_offline(config)
 
-    except Exception as e:
-        logger.error("MQTT data publish failed: %s", e)
-        _disconnect(client)
-        return False
 
+async def publish_tank_data_async(config: dict, data: dict):
+    """Async variant of publish_tank_data for use from the event loop.
 
-def publish_offline(config: dict):
-    """Mark the sensor as offline."""
-    client = _get_mqtt_client(config)
-    if not client:
-        return
-    try:
-        result = client.publish(AVAILABILITY_TOPIC, "offline", retain=True, qos=1)
-        result.wait_for_publish()
-        _disconnect(client)
-    except Exception:
-        pass
+    Connecting and waiting on discovery PUBACKs can block, so the publish
+    runs in a worker thread rather than stalling the loop.
+    """
+    return await asyncio.to_thread(publish_tank_data, config, data)
 
 
 def test_mqtt_connection(config: dict) -> dict:
@@ -243,8 +448,13 @@ def test_mqtt_connection(config: dict) -> dict:
     if not MQTT_AVAILABLE:
         return {"success": False, "error": "paho-mqtt not installed"}
 
-    client = _get_mqtt_client(config)
+    client = _get_mqtt_client(config, TEST_CLIENT_ID)
     if client:
         _disconnect(client)
         return {"success": True, "message": "MQTT connection successful"}
     return {"success": False, "error": "Could not connect to MQTT broker"}
+
+
+def shutdown():
+    """Disconnect the shared publisher (call on add-on shutdown)."""
+    _publisher.close()
@@ -12,11 +12,78 @@ Usage:
 
 import argparse
 import asyncio
+import gzip
 import json
+import re
 import sys
 from datetime import datetime
 from playwright.async_api import async_playwright
 
+# Responses we never need to inspect: static bundles and media, and
+# anything too large to be a useful API payload
+STATIC_ASSET_RE = re.compile(
+    r"\.(?:js|css|map|woff2?|ttf|png|jpe?g|gif|svg|ico|webp)(?:[?#]|$)",
+    re.IGNORECASE,
+)
+MAX_BODY_BYTES = 64_000
+JSON_CONTENT_TYPES = ("application/json", "text/json")
+TANK_KEYWORD_RE = re.compile(
+    r"tank|litres?|oil|capacity|usable|level|percent", re.IGNORECASE
+)
+
+# Fills the login form and clicks submit inside the page.  Returns
+# "submitted", "no-submit" (fields filled, no button found) or "missing".
+FILL_LOGIN_JS = """
+([email, password]) => {
+    const emailField = document.querySelector(
+        'input[name="user[email]"], input[type="email"], input#user_email');
+    const passwordField = document.querySelector(
+        'input[name="user[password]"], input[type="password"], input#user_password');
+    if (!emailField || !passwordField) return "missing";
+    for (const [field, value] of [[emailField, email], [passwordField, password]]) {
+        field.value = value;
+        field.dispatchEvent(new Event("input", {bubbles: true}));
+        field.dispatchEvent(new Event("change", {bubbles: true}));
+    }
+    const submit = document.querySelector(
+            'input[type="submit"], button[type="submit"], input[value="Log"]')
+        || Array.from(document.querySelectorAll("button"))
+            .find(b => b.textContent.includes("Log"));
+    if (!submit) return "no-submit";
+    submit.click();
+    return "submitted";
+}
+"""
+
+
+def _save_page_html(name: str, html: str) -> str:
+    """Write a captured page to a gzipped HTML file and return its name."""
+    safe_name = name.replace("https://", "").replace("/", "_").replace(":", "")
+    filename = f"probe_page_{safe_name}.html.gz"
+    with gzip.open(filename, "wt", encoding="utf-8") as f:
+        f.write(html)
+    return filename
+
+
+async def _wait_for_body(page, timeout: int = 5000):
+    """Wait until the body has rendered some content (best effort)."""
+    try:
+        await page.wait_for_selector("body *", timeout=timeout)
+    except Exception:
+        pass
+
+
+async def _load_page(context, url: str, timeout: int):
+    """Open url in a new page and return (page, html)."""
+    page = await context.new_page()
+    try:
+        await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+        await _wait_for_body(page)
+        return page, await page.content()
+    except BaseException:
+        await page.close()
+        raise
+
 
 async def probe_boilerjuice(email: str, password: str, tank_id: str):
     """Log in to BoilerJuice and intercept network requests."""
@@ -43,55 +110,60 @@ async def probe_boilerjuice(email: str, password: str, tank_id: str):
         # Intercept all network responses
         async def handle_response(response):
             url = response.url
+            if STATIC_ASSET_RE.search(url):
+                return
+            content_length = response.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > MAX_BODY_BYTES:
+                return
             content_type = response.headers.get("content-type", "")
+            is_json = content_type.startswith(JSON_CONTENT_TYPES)
 
-            # Capture JSON/API responses
-            if any(ct in content_type for ct in ["application/json", "text/json"]):
+            # Capture JSON/API responses, and XHR/fetch to non-static URLs
+            if not is_json and response.request.resource_type not in ("xhr", "fetch"):
+                return
+            try:
+                raw = await response.body()
+            except Exception:
+                return
+            if len(raw) > MAX_BODY_BYTES:
+                return
+
+            text = raw[:2048].decode("utf-8", errors="replace")
+            entry = {
+                "url": url,
+                "status": response.status,
+                "method": response.request.method,
+                "content_type": content_type,
+                "body_preview": text[:500],
+            }
+            discovered_apis.append(entry)
+
+            if is_json:
+                print(f"\n[API] {response.request.method} {url}")
+                print(f"  Status: {response.status}")
                 try:
-                    body = await response.json()
-                    entry = {
-                        "url": url,
-                        "status": response.status,
-                        "method": response.request.method,
-                        "content_type": content_type,
-                        "body_preview": json.dumps(body)[:500],
-                    }
-                    discovered_apis.append(entry)
-                    print(f"\n[API] {response.request.method} {url}")
-                    print(f"  Status: {response.status}")
+                    body = json.loads(raw)
                     print(f"  Body: {json.dumps(body, indent=2)[:300]}")
-                except Exception:
-                    pass
-
-            # Also capture XHR/fetch to non-static URLs
-            elif response.request.resource_type in ("xhr", "fetch"):
-                try:
-                    text = await response.text()
-                    entry = {
-                        "url": url,
-                        "status": response.status,
-                        "method": response.request.method,
-                        "content_type": content_type,
-                        "body_preview": text[:500],
-                    }
-                    discovered_apis.append(entry)
-                    print(f"\n[XHR] {response.request.method} {url}")
-                    print(f"  Status: {response.status}")
-                    print(f"  Content-Type: {content_type}")
+                except ValueError:
                     print(f"  Body: {text[:300]}")
-                except Exception:
-                    pass
+            else:
+                print(f"\n[XHR] {response.request.method} {url}")
+                print(f"  Status: {response.status}")
+                print(f"  Content-Type: {content_type}")
+                print(f"  Body: {text[:300]}")
 
-        page.on("response", handle_response)
+        # Listen on the context so every page opened below is captured
+        context.on("response", handle_response)
 
         # Step 1: Navigate to login page
         print("\n--- Step 1: Loading login page ---")
         try:
             await page.goto(
                 "https://www.boilerjuice.com/uk/users/login",
-                wait_until="networkidle",
+                wait_until="domcontentloaded",
                 timeout=30000,
             )
+            await _wait_for_body(page)
             print(f"  URL: {page.url}")
             page_contents["login_page"] = await page.content()
         except Exception as e:
@@ -102,33 +174,23 @@ async def probe_boilerjuice(email: str, password: str, tank_id: str):
         # Step 2: Fill login form and submit
         print("\n--- Step 2: Logging in ---")
         try:
-            # Look for form fields
-            email_field = await page.query_selector(
-                'input[name="user[email]"], input[type="email"], input#user_email'
-            )
-            password_field = await page.query_selector(
-                'input[name="user[password]"], input[type="password"], input#user_password'
-            )
+            # Fill and submit in one round-trip to the browser
+            login_result = await page.evaluate(FILL_LOGIN_JS, [email, password])
 
-            if email_field and password_field:
-                await email_field.fill(email)
-                await password_field.fill(password)
+            if login_result != "missing":
                 print("  Filled credentials")
-
-                # Find and click submit button
-                submit_btn = await page.query_selector(
-                    'input[type="submit"], button[type="submit"], '
-                    'button:has-text("Log"), input[value="Log"]'
-                )
-                if submit_btn:
-                    await submit_btn.click()
-                    await page.wait_for_load_state("networkidle", timeout=15000)
-                    print(f"  After login URL: {page.url}")
-                else:
+                if login_result == "no-submit":
                     # Try submitting the form directly
                     await page.press('input[type="password"]', "Enter")
-                    await page.wait_for_load_state("networkidle", timeout=15000)
-                    print(f"  After login URL: {page.url}")
+                try:
+                    await page.wait_for_url(
+                        lambda url: "/login" not in url,
+                        wait_until="domcontentloaded",
+                        timeout=15000,
+                    )
+                except Exception:
+                    pass
+                print(f"  After login URL: {page.url}")
             else:
                 print("  Could not find login form fields!")
                 # Dump page HTML for debugging
@@ -157,32 +219,46 @@ async def probe_boilerjuice(email: str, password: str, tank_id: str):
             "https://www.boilerjuice.com/uk/users/dashboard",
         ]
 
-        for tank_url in tank_urls:
+        # Load every candidate in its own page at once, but take the first
+        # one in tank_urls order that looks like a tank page — the keywords
+        # match most pages on this site, so priority matters
+        tasks = [
+            asyncio.create_task(_load_page(context, url, timeout=20000))
+            for url in tank_urls
+        ]
+        tank_page = None
+        for i, (task, tank_url) in enumerate(zip(tasks, tank_urls)):
+            print(f"\n  Tried: {tank_url}")
             try:
-                print(f"\n  Trying: {tank_url}")
-                await page.goto(tank_url, wait_until="networkidle", timeout=20000)
-                print(f"  Final URL: {page.url}")
-                content = await page.content()
-                page_contents[tank_url] = content
-
-                # Check if page has tank-related data
-                has_tank_data = any(
-                    keyword in content.lower()
-                    for keyword in [
-                        "tank", "litres", "litre", "oil", "capacity",
-                        "usable", "level", "percent",
-                    ]
-                )
-                print(f"  Has tank keywords: {has_tank_data}")
-
-                if has_tank_data:
-                    print(f"  Page length: {len(content)} chars")
-                    # Try to extract visible text
-                    text = await page.inner_text("body")
-                    print(f"  Visible text (first 500 chars): {text[:500]}")
-                    break
+                candidate, content = await task
             except Exception as e:
                 print(f"  Error: {e}")
+                continue
+            print(f"  Final URL: {candidate.url}")
+            page_contents[tank_url] = content
+
+            # Check if page has tank-related data
+            has_tank_data = TANK_KEYWORD_RE.search(content) is not None
+            print(f"  Has tank keywords: {has_tank_data}")
+
+            if has_tank_data:
+                tank_page = candidate
+                print(f"  Page length: {len(content)} chars")
+                # Try to extract visible text
+                text = await candidate.inner_text("body")
+                print(f"  Visible text (first 500 chars): {text[:500]}")
+                # Lower-priority candidates are no longer needed
+                rest = tasks[i + 1:]
+                for other in rest:
+                    other.cancel()
+                for result in await asyncio.gather(*rest, return_exceptions=True):
+                    if isinstance(result, tuple):
+                        await result[0].close()
+                break
+            await candidate.close()
+
+        if tank_page is not None:
+            page = tank_page
 
         # Step 4: Wait a bit more for any lazy-loaded API calls
         print("\n--- Step 4: Waiting for additional API calls ---")
@@ -191,12 +267,13 @@ async def probe_boilerjuice(email: str, password: str, tank_id: str):
         # Step 5: Try clicking around for more API discovery
         print("\n--- Step 5: Looking for navigation elements ---")
         try:
-            links = await page.query_selector_all("a")
-            for link in links[:20]:
-                text = await link.inner_text()
-                href = await link.get_attribute("href")
-                if text.strip():
-                    print(f"  Link: '{text.strip()}' -> {href}")
+            links = await page.evaluate(
+                "() => Array.from(document.querySelectorAll('a')).slice(0, 20)"
+                ".map(a => [a.innerText.trim(), a.getAttribute('href')])"
+            )
+            for text, href in links:
+                if text:
+                    print(f"  Link: '{text}' -> {href}")
         except Exception as e:
             print(f"  Error listing links: {e}")
 
@@ -225,12 +302,12 @@ async def probe_boilerjuice(email: str, password: str, tank_id: str):
         json.dump(results, f, indent=2)
     print(f"\nFull results saved to: {output_file}")
 
-    # Save page HTML for analysis
-    for name, html in page_contents.items():
-        safe_name = name.replace("https://", "").replace("/", "_").replace(":", "")
-        filename = f"probe_page_{safe_name}.html"
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(html)
+    # Save page HTML for analysis (gzipped, written in parallel)
+    filenames = await asyncio.gather(*(
+        asyncio.to_thread(_save_page_html, name, html)
+        for name, html in page_contents.items()
+    ))
+    for filename in filenames:
         print(f"Saved page HTML: {filename}")
 
     return results
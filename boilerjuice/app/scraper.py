@@ -6,28 +6,62 @@ Uses Selenium with system Chromium to authenticate with BoilerJuice
 tank data.
 
 Cookies are persisted to disk so the user only needs to solve CAPTCHA
-occasionally (when the WAF token expires).
+occasionally (when the WAF token expires).  Routine fetches reuse those
+cookies over plain HTTP and only fall back to the browser when the WAF
+or login page gets in the way.
 """
 
-import base64
+import asyncio
+import concurrent.futures
+import html as html_lib
 import json
 import logging
 import os
 import re
 import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timezone
 from typing import Optional
+from urllib.parse import urlsplit
 
+import aiohttp
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 
 logger = logging.getLogger(__name__)
 
+# Prefer orjson (C, bytes in/out) for the cookie and history files
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    _loads = json.loads
+
+
+def _atomic_write(path: str, data: bytes):
+    """Write a file via a temp file + rename so readers never see half of it."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
 # BoilerJuice URLs
 LOGIN_URL = "https://www.boilerjuice.com/uk/users/login"
 TANK_URL_TEMPLATE = "https://www.boilerjuice.com/uk/users/tanks/{tank_id}/edit"
@@ -36,14 +70,190 @@ MY_ACCOUNT_URL = "https://www.boilerjuice.com/my-account"
 
 DATA_DIR = os.environ.get("DATA_DIR", "/data")
 COOKIE_FILE = os.path.join(DATA_DIR, "cookies.json")
-HISTORY_FILE = os.path.join(DATA_DIR, "history.json")
+# Persistent Chromium profile: keeps the HTTP cache (WAF challenge JS etc.)
+# across browser restarts.  Cookies are still mirrored to COOKIE_FILE for
+# the plain-HTTP fetch path.
+CHROME_PROFILE_DIR = os.path.join(DATA_DIR, "chrome-profile")
+CHROME_DISK_CACHE_BYTES = 50 * 1024 * 1024
+# One JSON reading per line, appended on each fetch
+HISTORY_FILE = os.path.join(DATA_DIR, "history.jsonl")
+LEGACY_HISTORY_FILE = os.path.join(DATA_DIR, "history.json")
+HISTORY_MAX_ENTRIES = 500
+# Trim the file back to HISTORY_MAX_ENTRIES once it grows past this
+HISTORY_COMPACT_BYTES = 1024 * 1024
+# Restart Chromium after this many browser fetches to cap memory growth
+DRIVER_RECYCLE_FETCHES = 200
+# A successful fetch is reused for this many seconds (absorbs racing refreshes)
+FETCH_CACHE_TTL = 10
+
+BASE_URL = "https://www.boilerjuice.com/"
+# Pages whose cookies we persist — asked for by URL so the save doesn't
+# depend on where the browser happens to be (e.g. a WAF challenge page)
+COOKIE_URLS = [BASE_URL, LOGIN_URL, DASHBOARD_URL, MY_ACCOUNT_URL]
+
+# WAF tokens are tied to the browser fingerprint, so plain HTTP requests
+# must present the same user agent as the Selenium browser
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
 
 # Page detection constants
 CAPTCHA_INDICATORS = ["human verification", "captcha", "awswaf", "confirm you are human"]
 LOGIN_INDICATORS = ['user[email]', 'user[password]', 'log in', 'sign in']
 TANK_INDICATORS = ["tank", "litres", "oil", "capacity", "usable"]
 
-
+# Page types in order of precedence — a CAPTCHA page mentioning "oil" is
+# still a CAPTCHA page
+PAGE_TYPES = (
+    ("captcha", CAPTCHA_INDICATORS),
+    ("login", LOGIN_INDICATORS),
+    ("tank", TANK_INDICATORS),
+)
+
+# One case-insensitive pattern per page type, tried in order of precedence
+PAGE_TYPE_PATTERNS = [
+    (name, re.compile("|".join(map(re.escape, indicators)), re.IGNORECASE))
+    for name, indicators in PAGE_TYPES
+]
+# The same indicators as JS regex sources, for classifying in the browser
+PAGE_TYPE_SOURCES = [
+    [name, "|".join(map(re.escape, indicators))] for name, indicators in PAGE_TYPES
+]
+
+# Percentage extraction patterns, merged so the text is scanned once.
+# PCT_GROUPS lists the alternatives in order of preference.
+PCT_RE = re.compile(
+    r"(?P<full>\d+(?:\.\d+)?)\s*%\s*(?:full|level|remaining)"
+    r"|(?:level|percentage|percent)[:\s]+(?P<labelled>\d+(?:\.\d+)?)"
+    r"|(?P<bare>\d+(?:\.\d+)?)\s*%",
+    re.IGNORECASE,
+)
+PCT_GROUPS = ("full", "labelled", "bare")
+# The tank summary is near the top; don't regex-scan the FAQ/footer
+TEXT_SCAN_LIMIT = 32 * 1024
+DATA_PERCENTAGE_RE = re.compile(r'data-percentage\s*=\s*["\']?(\d+(?:\.\d+)?)')
+# Strips script/style blocks and tags to approximate the page's visible text
+HTML_TAG_RE = re.compile(r"(?is)<(script|style)\b.*?</\1>|<[^>]+>")
+
+# Fill level names, highest threshold first (keep in step with app.js)
+LEVEL_THRESHOLDS = ((60, "High"), (30, "Medium"), (0, "Low"))
+
+# Nodes the extractor reads — a fetch waits for one of these, not a fixed sleep
+TANK_READY_SELECTOR = "[data-percentage], #usable-oil, #total-oil, input[title='tank-size-count']"
+TANK_READY_TIMEOUT = 5
+# Auth flow waits: the login form or the WAF CAPTCHA widget, a click/key
+# that may navigate, and the page after submitting the login form
+AUTH_READY_SELECTOR = "input[name='user[email]'], #captcha-container, awswaf-captcha"
+AUTH_READY_TIMEOUT = 10
+SETTLE_TIMEOUT = 1.0
+LOGIN_SUBMIT_TIMEOUT = 15
+# A fetch is done waiting once either kind of page has rendered
+FETCH_READY_SELECTOR = f"{TANK_READY_SELECTOR}, {AUTH_READY_SELECTOR}"
+# Key names the web UI sends to /api/auth/key, mapped to Selenium keys
+AUTH_KEY_MAP = {
+    "Enter": Keys.RETURN,
+    "Tab": Keys.TAB,
+    "Escape": Keys.ESCAPE,
+}
+# Login form fields — email/submit are looked up inside the password's form
+LOGIN_EMAIL_SELECTOR = 'input[name="user[email]"], input[type="email"], input#user_email'
+LOGIN_PASSWORD_SELECTOR = 'input[name="user[password]"], input[type="password"], input#user_password'
+LOGIN_SUBMIT_SELECTOR = 'input[type="submit"], button[type="submit"]'
+# Returns [email, password, submit, body] in one round trip (null if missing)
+LOGIN_FIELDS_JS = """
+const pw = document.querySelector(arguments[1]);
+const root = (pw && pw.form) || document;
+return [root.querySelector(arguments[0]), pw, root.querySelector(arguments[2]), document.body];
+"""
+# Fetches arguments[0] (a list of URLs) in parallel from inside the page and
+# hands back their HTML ('' for any that failed) — run with execute_async_script
+FETCH_PAGES_JS = """
+const done = arguments[arguments.length - 1];
+Promise.all(arguments[0].map(url =>
+    fetch(url, {credentials: 'include'}).then(r => r.text()).catch(() => '')
+)).then(done);
+"""
+# Classifies the page in the browser (same indicators and precedence as
+# _detect_page_type) so the DOM never has to be shipped back over WebDriver.
+# Takes PAGE_TYPE_SOURCES as arguments[0].
+_PAGE_TYPE_JS = """
+function pageType(types) {
+    const html = document.documentElement.outerHTML;
+    for (const [name, source] of types) {
+        if (new RegExp(source, 'i').test(html)) return name;
+    }
+    return 'unknown';
+}
+"""
+PAGE_INFO_JS = _PAGE_TYPE_JS + """
+return {url: location.href, title: document.title, page_type: pageType(arguments[0])};
+"""
+# Reads everything a fetch needs from the page in a single script call;
+# pass PAGE_TYPE_SOURCES (or null to skip) to classify the page too
+READ_PAGE_JS = _PAGE_TYPE_JS + """
+const el = document.querySelector('[data-percentage]');
+const pct = el ? el.getAttribute('data-percentage') : null;
+return {
+    url: location.href,
+    pct: pct,
+    // innerText forces a layout pass — only needed for the regex fallback
+    text: !(parseFloat(pct) > 0) && document.body ? document.body.innerText : '',
+    page_type: arguments[0] ? pageType(arguments[0]) : null,
+};
+"""
+# Analytics/ad hosts — never needed, blocked for the driver's whole life
+TRACKER_BLOCKED_URLS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*clarity.ms*",
+]
+# Plus assets we never need when scraping (images are still allowed during
+# auth, the CAPTCHA is drawn with them)
+FETCH_BLOCKED_URLS = TRACKER_BLOCKED_URLS + [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm",
+]
+
+
+# JPEG quality for the remote-browser screenshots (CAPTCHA stays legible)
+SCREENSHOT_QUALITY = 60
+
+# Chromium features we have no use for; the V8 heap cap keeps the
+# renderer small on low-RAM Home Assistant hosts
+CHROME_LEAN_ARGS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-component-update",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-breakpad",
+    "--metrics-recording-only",
+    "--disable-features=Translate,site-per-process",
+    "--disable-renderer-backgrounding",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--js-flags=--max-old-space-size=256",
+]
+
+# Content we never want (2 = block).  Images stay on — the CAPTCHA needs
+# them; fetches block them per-request via FETCH_BLOCKED_URLS instead.
+CHROME_PREFS = {
+    "profile.managed_default_content_settings.plugins": 2,
+    "profile.managed_default_content_settings.popups": 2,
+    "profile.managed_default_content_settings.geolocation": 2,
+    "profile.managed_default_content_settings.notifications": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+}
+
+# Injected into every document so the WAF doesn't see navigator.webdriver
+HIDE_WEBDRIVER_JS = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+@dataclass(frozen=True, slots=True)
 class TankData:
     """Represents tank reading data.
 
@@ -53,36 +263,36 @@ class TankData:
     Capacity comes from the user's settings (or from the page if found).
     """
 
-    def __init__(
-        self,
-        litres: float = 0,
-        percent: float = 0,
-        capacity: float = 0,
-        level_name: str = "Unknown",
-        timestamp: Optional[str] = None,
-        # Legacy keys accepted but ignored (for history compat)
-        total_litres: float = 0,
-        total_percent: float = 0,
-        **_extra,
-    ):
-        self.litres = litres
-        self.percent = percent
-        self.capacity = capacity
-        self.level_name = level_name
-        self.timestamp = timestamp or datetime.now(timezone.utc).isoformat()
-
-    def to_dict(self) -> dict:
-        return {
+    litres: float = 0
+    percent: float = 0
+    capacity: float = 0
+    level_name: str = "Unknown"
+    timestamp: Optional[str] = None
+    _dict: dict = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.timestamp:
+            object.__setattr__(self, "timestamp", datetime.now(timezone.utc).isoformat())
+        # Readings are frozen — build the dict once
+        object.__setattr__(self, "_dict", {
             "litres": self.litres,
             "percent": self.percent,
             "capacity": self.capacity,
             "level_name": self.level_name,
             "timestamp": self.timestamp,
-        }
+        })
+
+    def to_dict(self) -> dict:
+        # A copy, so callers can't reach in and change a frozen reading
+        return dict(self._dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TankData":
+        # Legacy keys (total_litres, total_percent, ...) are dropped
+        return cls(**{k: v for k, v in data.items() if k in _TANK_FIELDS})
 
-    @staticmethod
-    def from_dict(data: dict) -> "TankData":
-        return TankData(**data)
+
+_TANK_FIELDS = frozenset(f.name for f in fields(TankData) if f.init)
 
 
 class BoilerJuiceScraper:
@@ -90,10 +300,25 @@ class BoilerJuiceScraper:
 
     def __init__(self):
         self._driver: Optional[webdriver.Chrome] = None
+        self._driver_fetches = 0  # browser fetches since the driver started
         self._lock = threading.Lock()
+        # Driver work gets its own thread so it never ties up the default pool
+        self._driver_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="bjscraper"
+        )
         self._auth_in_progress = False
-        self._last_tank_data: Optional[TankData] = None
         self._last_error: Optional[str] = None
+        # Plain HTTP session for scheduled fetches, seeded from saved cookies
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._http_cookie_mtime: Optional[int] = None
+        self._http_cookies: list = []  # saved browser cookies, sent verbatim
+        self._saved_cookies: Optional[bytes] = None  # last bytes written to COOKIE_FILE
+        # One fetch at a time; callers that arrive mid-fetch get its result
+        self._fetch_lock = asyncio.Lock()
+        self._last_fetch: Optional[tuple] = None  # (monotonic ts, key, result)
+        self._history: deque = deque(maxlen=HISTORY_MAX_ENTRIES)  # newest last
+        self._migrate_legacy_history()
+        self._load_history()
 
     def _create_driver(self) -> webdriver.Chrome:
         """Create a new Chrome/Chromium WebDriver instance."""
@@ -105,11 +330,12 @@ class BoilerJuiceScraper:
         chrome_options.add_argument("--window-size=1280,800")
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_argument("--lang=en-GB")
-        chrome_options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
+        chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+        # Switch off subsystems a headless scraper never uses (startup time/RAM)
+        for arg in CHROME_LEAN_ARGS:
+            chrome_options.add_argument(arg)
+        # Return from get() at DOMContentLoaded; callers wait for what they need
+        chrome_options.page_load_strategy = "eager"
 
         # Use system chromium-browser if available
         chrome_bin = os.environ.get("CHROME_BIN")
@@ -129,23 +355,95 @@ class BoilerJuiceScraper:
         else:
             service = Service()
 
+        chrome_options.add_experimental_option("prefs", CHROME_PREFS)
+
+        os.makedirs(CHROME_PROFILE_DIR, exist_ok=True)
+        self._clear_profile_locks()
+        chrome_options.add_argument(f"--user-data-dir={CHROME_PROFILE_DIR}")
+        chrome_options.add_argument(f"--disk-cache-size={CHROME_DISK_CACHE_BYTES}")
+
         # Hide webdriver flag
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option("useAutomationExtension", False)
 
         driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.execute_cdp_cmd(
-            "Page.addScriptToEvaluateOnNewDocument",
-            {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"},
-        )
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": HIDE_WEBDRIVER_JS})
         driver.set_page_load_timeout(30)
-        driver.implicitly_wait(3)
+        # No implicit wait — it stacks onto every explicit wait poll and every
+        # find_element miss; waits are done with WebDriverWait instead
+        driver.implicitly_wait(0)
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": TRACKER_BLOCKED_URLS})
         return driver
 
+    @staticmethod
+    def _clear_profile_locks():
+        """Remove Chromium's profile lock files left by a crash or restart.
+
+        The container's hostname changes between runs, so Chromium would
+        otherwise think another machine still holds the profile.  We only
+        ever run one browser, so any lock found here is stale.
+        """
+        for name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
+            path = os.path.join(CHROME_PROFILE_DIR, name)
+            if os.path.lexists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning("Could not remove stale %s: %s", name, e)
+
+    def _block_heavy_assets(self, enabled: bool):
+        """Toggle blocking of images, fonts and media (trackers stay blocked)."""
+        try:
+            self._driver.execute_cdp_cmd(
+                "Network.setBlockedURLs",
+                {"urls": FETCH_BLOCKED_URLS if enabled else TRACKER_BLOCKED_URLS},
+            )
+        except Exception as e:
+            logger.debug("Could not set blocked URLs: %s", e)
+
+    def _wait_for(self, condition, timeout: float) -> bool:
+        """Wait for an expected condition; False if it timed out."""
+        try:
+            WebDriverWait(self._driver, timeout, poll_frequency=0.1).until(condition)
+            return True
+        except TimeoutException:
+            return False
+
+    def _wait_for_tank_page(self):
+        """Wait until the page has the nodes the extractor reads, or we got
+        the login form / CAPTCHA instead (or time out)."""
+        self._wait_for(
+            EC.any_of(
+                EC.presence_of_element_located((By.CSS_SELECTOR, FETCH_READY_SELECTOR)),
+                EC.url_contains("login"),
+            ),
+            TANK_READY_TIMEOUT,
+        )
+
+    def _wait_for_settle(self, old_body, timeout: float = SETTLE_TIMEOUT):
+        """Give a click/key press/submit a chance to navigate.
+
+        Returns once the old document is gone and the new one has parsed,
+        or after `timeout` if the page stays put.
+        """
+        if self._wait_for(EC.staleness_of(old_body), timeout):
+            self._wait_for(
+                lambda d: d.execute_script("return document.readyState") != "loading",
+                AUTH_READY_TIMEOUT,
+            )
+
     def _ensure_driver(self):
-        """Ensure we have a running driver."""
+        """Ensure we have a running, responsive driver."""
+        if self._driver is not None:
+            try:
+                self._driver.current_url  # cheap liveness check
+            except Exception as e:  # a dead chromedriver raises urllib3 errors
+                logger.warning("Browser not responding (%s) — restarting", e)
+                self.close()
         if self._driver is None:
             self._driver = self._create_driver()
+            self._driver_fetches = 0
             self._load_cookies()
 
     def _save_cookies(self):
@@ -153,39 +451,94 @@ class BoilerJuiceScraper:
         if self._driver is None:
             return
         try:
-            cookies = self._driver.get_cookies()
+            cookies = self._driver.execute_cdp_cmd(
+                "Network.getCookies", {"urls": COOKIE_URLS}
+            )["cookies"]
+            cookies = [self._from_cdp_cookie(c) for c in cookies]
+            data = _dumps(cookies)
+            if data == self._saved_cookies:
+                return  # unchanged — keep the file (and its mtime) as is
             os.makedirs(DATA_DIR, exist_ok=True)
-            with open(COOKIE_FILE, "w") as f:
-                json.dump(cookies, f, indent=2)
+            _atomic_write(COOKIE_FILE, data)
+            self._saved_cookies = data
             logger.info("Saved %d cookies", len(cookies))
         except Exception as e:
             logger.error("Failed to save cookies: %s", e)
 
     def _load_cookies(self):
-        """Load cookies into the browser from persistent storage."""
-        if self._driver is None or not os.path.exists(COOKIE_FILE):
+        """Seed the browser's cookies from persistent storage.
+
+        Only when the profile has no BoilerJuice cookies of its own (new or
+        wiped profile) — otherwise its own cookies are at least as fresh as
+        the file, and overwriting them could log a valid session out.
+        """
+        if self._driver is None:
             return
         try:
-            with open(COOKIE_FILE, "r") as f:
-                cookies = json.load(f)
-            if not cookies:
+            existing = self._driver.execute_cdp_cmd(
+                "Network.getCookies", {"urls": COOKIE_URLS}
+            )["cookies"]
+            if existing:
+                logger.info("Browser profile already has %d cookies — not seeding", len(existing))
                 return
-            # Navigate to the domain first so we can set cookies
-            self._driver.get("https://www.boilerjuice.com")
-            import time
-            time.sleep(1)
-            for cookie in cookies:
-                # Remove problematic fields that Selenium doesn't accept
-                for key in ["sameSite", "httpOnly", "expiry"]:
-                    cookie.pop(key, None)
+            data = self._saved_cookies
+            if data is None:
+                # First driver of this run — later restarts reuse these bytes
                 try:
-                    self._driver.add_cookie(cookie)
-                except Exception:
-                    pass
+                    with open(COOKIE_FILE, "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    return
+                self._saved_cookies = data
+            cookies = _loads(data)
+            if not cookies:
+                return
+            # One CDP call, no need to navigate to the domain first
+            self._driver.execute_cdp_cmd(
+                "Network.setCookies",
+                {"cookies": [self._to_cdp_cookie(c) for c in cookies]},
+            )
             logger.info("Loaded %d cookies", len(cookies))
         except Exception as e:
             logger.error("Failed to load cookies: %s", e)
 
+    @staticmethod
+    def _from_cdp_cookie(cookie: dict) -> dict:
+        """Convert a CDP Network.Cookie to the Selenium dict we store."""
+        saved = {
+            "name": cookie["name"],
+            "value": cookie["value"],
+            "domain": cookie["domain"],
+            "path": cookie["path"],
+            "secure": cookie["secure"],
+            "httpOnly": cookie["httpOnly"],
+        }
+        if not cookie.get("session") and cookie.get("expires", -1) > 0:
+            saved["expiry"] = int(cookie["expires"])
+        if cookie.get("sameSite"):
+            saved["sameSite"] = cookie["sameSite"]
+        return saved
+
+    @staticmethod
+    def _to_cdp_cookie(cookie: dict) -> dict:
+        """Convert a Selenium cookie dict to a CDP Network.CookieParam."""
+        param = {
+            "name": cookie["name"],
+            "value": cookie["value"],
+            "path": cookie.get("path", "/"),
+            "secure": bool(cookie.get("secure")),
+            "httpOnly": bool(cookie.get("httpOnly")),
+        }
+        if cookie.get("domain"):
+            param["domain"] = cookie["domain"]
+        else:
+            param["url"] = BASE_URL
+        if "expiry" in cookie:
+            param["expires"] = cookie["expiry"]
+        if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+            param["sameSite"] = cookie["sameSite"]
+        return param
+
     def close(self):
         """Close browser and cleanup."""
         try:
@@ -198,22 +551,22 @@ class BoilerJuiceScraper:
 
     def _detect_page_type(self, html: str) -> str:
         """Detect what type of page we're on."""
-        html_lower = html.lower()
-        if any(indicator in html_lower for indicator in CAPTCHA_INDICATORS):
-            return "captcha"
-        if any(indicator in html_lower for indicator in LOGIN_INDICATORS):
-            return "login"
-        if any(indicator in html_lower for indicator in TANK_INDICATORS):
-            return "tank"
+        for name, pattern in PAGE_TYPE_PATTERNS:
+            if pattern.search(html):
+                return name
         return "unknown"
 
     def get_screenshot_base64(self) -> Optional[str]:
-        """Take a screenshot and return as base64."""
+        """Take a screenshot and return it as base64 JPEG."""
         if self._driver is None:
             return None
         try:
-            png = self._driver.get_screenshot_as_png()
-            return base64.b64encode(png).decode("utf-8")
+            # CDP hands back base64 already; JPEG is a fraction of the PNG size
+            shot = self._driver.execute_cdp_cmd(
+                "Page.captureScreenshot",
+                {"format": "jpeg", "quality": SCREENSHOT_QUALITY},
+            )
+            return shot["data"]
         except Exception as e:
             logger.error("Screenshot failed: %s", e)
             return None
@@ -223,27 +576,63 @@ class BoilerJuiceScraper:
         if self._driver is None:
             return {"status": "no_page", "url": "", "page_type": "none"}
         try:
-            html = self._driver.page_source
+            info = self._driver.execute_script(PAGE_INFO_JS, PAGE_TYPE_SOURCES)
             return {
                 "status": "ready",
-                "url": self._driver.current_url,
-                "page_type": self._detect_page_type(html),
-                "title": self._driver.title,
+                "url": info["url"],
+                "page_type": info["page_type"],
+                "title": info["title"],
             }
         except Exception as e:
             return {"status": "error", "error": str(e)}
 
     # ── Auth flow (remote browser for CAPTCHA solving) ──────────────
 
+    async def _run_driver(self, fn, *args):
+        """Run blocking driver work on the driver thread, one call at a time,
+        so the event loop keeps serving the API while Chromium works."""
+        def locked():
+            with self._lock:
+                return fn(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._driver_executor, locked)
+
     async def start_auth(self) -> dict:
         """Start authentication — navigate to login page."""
+        return await self._run_driver(self._start_auth)
+
+    async def auth_click(self, x: int, y: int) -> dict:
+        """Click at coordinates on the page (for CAPTCHA solving)."""
+        return await self._run_driver(self._auth_click, x, y)
+
+    async def auth_type(self, text: str) -> dict:
+        """Type text into the focused element."""
+        return await self._run_driver(self._auth_type, text)
+
+    async def auth_press_key(self, key: str) -> dict:
+        """Press a keyboard key."""
+        return await self._run_driver(self._auth_press_key, key)
+
+    async def auth_fill_login(self, email: str, password: str) -> dict:
+        """Fill and submit the login form."""
+        return await self._run_driver(self._auth_fill_login, email, password)
+
+    async def get_screenshot_base64_async(self) -> Optional[str]:
+        """Take a screenshot without blocking the event loop."""
+        return await self._run_driver(self.get_screenshot_base64)
+
+    def _start_auth(self) -> dict:
+        """Blocking body of start_auth() — runs in a worker thread."""
         self._auth_in_progress = True
         self._last_error = None
         try:
             self._ensure_driver()
             self._driver.get(LOGIN_URL)
-            import time
-            time.sleep(3)  # Wait for WAF challenge JS
+            # The WAF challenge JS either lands on the login form or the CAPTCHA
+            self._wait_for(
+                EC.presence_of_element_located((By.CSS_SELECTOR, AUTH_READY_SELECTOR)),
+                AUTH_READY_TIMEOUT,
+            )
 
             screenshot = self.get_screenshot_base64()
             page_info = self.get_page_info()
@@ -253,18 +642,17 @@ class BoilerJuiceScraper:
             logger.error("Auth start failed: %s", e)
             return {"success": False, "error": str(e)}
 
-    async def auth_click(self, x: int, y: int) -> dict:
-        """Click at coordinates on the page (for CAPTCHA solving)."""
+    def _auth_click(self, x: int, y: int) -> dict:
+        """Blocking body of auth_click() — runs in a worker thread."""
         if self._driver is None:
             return {"success": False, "error": "No active browser"}
         try:
-            actions = ActionChains(self._driver)
+            old_body = self._driver.find_element(By.TAG_NAME, "body")
             # Move to absolute position on the page using JavaScript
             self._driver.execute_script(
                 f"document.elementFromPoint({x}, {y}).click();"
             )
-            import time
-            time.sleep(1.5)
+            self._wait_for_settle(old_body)
             screenshot = self.get_screenshot_base64()
             page_info = self.get_page_info()
             return {"success": True, "screenshot": screenshot, "page_info": page_info}
@@ -274,80 +662,74 @@ class BoilerJuiceScraper:
                 body = self._driver.find_element(By.TAG_NAME, "body")
                 actions = ActionChains(self._driver)
                 actions.move_to_element_with_offset(body, x, y).click().perform()
-                import time
-                time.sleep(1.5)
+                self._wait_for_settle(body)
                 screenshot = self.get_screenshot_base64()
                 page_info = self.get_page_info()
                 return {"success": True, "screenshot": screenshot, "page_info": page_info}
             except Exception as e2:
                 return {"success": False, "error": str(e2)}
 
-    async def auth_type(self, text: str) -> dict:
-        """Type text into the focused element."""
+    def _auth_type(self, text: str) -> dict:
+        """Blocking body of auth_type() — runs in a worker thread."""
         if self._driver is None:
             return {"success": False, "error": "No active browser"}
         try:
             active = self._driver.switch_to.active_element
-            active.send_keys(text)
-            import time
-            time.sleep(0.5)
+            active.send_keys(text)  # synchronous — no need to wait before the screenshot
             screenshot = self.get_screenshot_base64()
             page_info = self.get_page_info()
             return {"success": True, "screenshot": screenshot, "page_info": page_info}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    async def auth_press_key(self, key: str) -> dict:
-        """Press a keyboard key."""
+    def _auth_press_key(self, key: str) -> dict:
+        """Blocking body of auth_press_key() — runs in a worker thread."""
         if self._driver is None:
             return {"success": False, "error": "No active browser"}
         try:
-            from selenium.webdriver.common.keys import Keys
-            key_map = {
-                "Enter": Keys.RETURN,
-                "Tab": Keys.TAB,
-                "Escape": Keys.ESCAPE,
-            }
-            selenium_key = key_map.get(key, key)
+            selenium_key = AUTH_KEY_MAP.get(key, key)
+            old_body = self._driver.find_element(By.TAG_NAME, "body")
             active = self._driver.switch_to.active_element
             active.send_keys(selenium_key)
-            import time
-            time.sleep(1)
+            self._wait_for_settle(old_body)
             screenshot = self.get_screenshot_base64()
             page_info = self.get_page_info()
             return {"success": True, "screenshot": screenshot, "page_info": page_info}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    async def auth_fill_login(self, email: str, password: str) -> dict:
-        """Fill and submit the login form."""
+    def _auth_fill_login(self, email: str, password: str) -> dict:
+        """Blocking body of auth_fill_login() — runs in a worker thread."""
         if self._driver is None:
             return {"success": False, "error": "No active browser"}
 
         try:
-            html = self._driver.page_source
-            page_type = self._detect_page_type(html)
+            page_info = self.get_page_info()
+            page_type = page_info.get("page_type")
 
             if page_type == "captcha":
                 return {
                     "success": False,
                     "error": "CAPTCHA detected. Please solve it first using the remote browser.",
-                    "page_info": self.get_page_info(),
+                    "page_info": page_info,
                     "screenshot": self.get_screenshot_base64(),
                 }
 
             if page_type != "login":
                 return {
                     "success": False,
-                    "error": f"Not on login page (detected: {page_type}). URL: {self._driver.current_url}",
-                    "page_info": self.get_page_info(),
+                    "error": f"Not on login page (detected: {page_type}). URL: {page_info.get('url')}",
+                    "page_info": page_info,
                     "screenshot": self.get_screenshot_base64(),
                 }
 
+            email_field, password_field, submit_btn, old_body = self._driver.execute_script(
+                LOGIN_FIELDS_JS,
+                LOGIN_EMAIL_SELECTOR, LOGIN_PASSWORD_SELECTOR, LOGIN_SUBMIT_SELECTOR,
+            )
+
             # Fill email
             try:
-                email_field = self._driver.find_element(By.CSS_SELECTOR,
-                    'input[name="user[email]"], input[type="email"], input#user_email')
                 email_field.clear()
                 email_field.send_keys(email)
             except Exception:
@@ -355,8 +737,6 @@ class BoilerJuiceScraper:
 
             # Fill password
             try:
-                password_field = self._driver.find_element(By.CSS_SELECTOR,
-                    'input[name="user[password]"], input[type="password"], input#user_password')
                 password_field.clear()
                 password_field.send_keys(password)
             except Exception:
@@ -364,25 +744,19 @@ class BoilerJuiceScraper:
 
             # Submit
             try:
-                submit_btn = self._driver.find_element(By.CSS_SELECTOR,
-                    'input[type="submit"], button[type="submit"]')
                 submit_btn.click()
             except Exception:
-                from selenium.webdriver.common.keys import Keys
                 password_field.send_keys(Keys.RETURN)
 
-            import time
-            time.sleep(5)
+            # Wait for the post-login page instead of a fixed sleep
+            self._wait_for_settle(old_body, LOGIN_SUBMIT_TIMEOUT)
 
             # Save cookies after login
             self._save_cookies()
 
             screenshot = self.get_screenshot_base64()
             page_info = self.get_page_info()
-
-            new_html = self._driver.page_source
-            new_type = self._detect_page_type(new_html)
-            logged_in = new_type not in ("captcha", "login")
+            logged_in = page_info.get("page_type") not in ("captcha", "login")
 
             self._auth_in_progress = not logged_in
 
@@ -400,10 +774,150 @@ class BoilerJuiceScraper:
     async def finish_auth(self):
         """Mark auth as complete and save session."""
         self._auth_in_progress = False
-        self._save_cookies()
+        await self._run_driver(self._save_cookies)
 
     # ── Data fetching ───────────────────────────────────────────────
 
+    async def fetch_tank_data(self, tank_id: str, user_capacity: float = 0) -> dict:
+        """Fetch tank data, trying a plain HTTP request first.
+
+        The tank page is server-rendered, so once the WAF/login cookies
+        exist it can usually be fetched without a browser.  Selenium is
+        only used (in a worker thread) when the HTTP attempt hits a
+        CAPTCHA/login page or can't find the data.
+        """
+        key = (tank_id, user_capacity)
+        async with self._fetch_lock:
+            cached = self._last_fetch
+            if cached and cached[1] == key and time.monotonic() - cached[0] < FETCH_CACHE_TTL:
+                return cached[2]
+
+            result = await self._fetch_tank_data_http(tank_id, user_capacity)
+            if result is None:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self._driver_executor,
+                    lambda: self.fetch_tank_data_sync(tank_id, user_capacity),
+                )
+
+            if result.get("success"):
+                self._last_fetch = (time.monotonic(), key, result)
+            return result
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use."""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=15),
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept-Language": "en-GB,en;q=0.9",
+                },
+                # We send the browser's cookies ourselves (see _cookie_header);
+                # a real jar would re-serialise and quote them
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+        return self._http
+
+    @staticmethod
+    def _read_cookie_file(known_mtime: Optional[int]) -> tuple:
+        """Read the saved cookies if the file changed since known_mtime.
+
+        Returns (mtime, cookies); cookies is None when unchanged and mtime
+        is None when there is no usable cookie file.
+        """
+        try:
+            mtime = os.stat(COOKIE_FILE).st_mtime_ns
+        except OSError:
+            return None, None
+        if mtime == known_mtime:
+            return mtime, None
+        try:
+            with open(COOKIE_FILE, "rb") as f:
+                return mtime, _loads(f.read())
+        except Exception as e:
+            logger.error("Failed to read cookies for HTTP fetch: %s", e)
+            return None, None
+
+    async def _sync_http_cookies(self) -> bool:
+        """Pick up the saved browser cookies for the HTTP fetch.
+
+        Reloads only when the cookie file has changed.  Returns False when
+        there are no saved cookies (never logged in).
+        """
+        mtime, cookies = await asyncio.to_thread(self._read_cookie_file, self._http_cookie_mtime)
+        if mtime is None:
+            return False
+        if cookies is not None:
+            self._http_cookies = cookies
+            self._http_cookie_mtime = mtime
+        return bool(self._http_cookies)
+
+    def _cookie_header(self, url: str) -> str:
+        """Build a Cookie header for url from the saved browser cookies.
+
+        Values go out exactly as the browser stored them — SimpleCookie
+        would quote ones containing '/', '=' or '+' (e.g. the WAF token).
+        """
+        parts = urlsplit(url)
+        host, path = parts.hostname or "", parts.path or "/"
+        now = time.time()
+        pairs = []
+        for cookie in self._http_cookies:
+            domain = cookie.get("domain", "").lstrip(".")
+            if domain and host != domain and not host.endswith("." + domain):
+                continue
+            cookie_path = cookie.get("path", "/")
+            if not (path == cookie_path or cookie_path == "/"
+                    or path.startswith(cookie_path.rstrip("/") + "/")):
+                continue
+            if cookie.get("expiry", now + 1) <= now:
+                continue
+            pairs.append(f"{cookie['name']}={cookie['value']}")
+        return "; ".join(pairs)
+
+    async def _fetch_tank_data_http(self, tank_id: str, user_capacity: float) -> Optional[dict]:
+        """Fetch the tank page over plain HTTP.
+
+        Returns the fetch result on success, or None if the browser is
+        needed instead.
+        """
+        session = self._get_http_session()
+        if not await self._sync_http_cookies():
+            return None
+
+        tank_url = TANK_URL_TEMPLATE.format(tank_id=tank_id)
+        logger.info("Fetching tank data over HTTP from %s", tank_url)
+        try:
+            headers = {"Cookie": self._cookie_header(tank_url)}
+            async with session.get(tank_url, headers=headers) as resp:
+                if resp.status != 200:
+                    logger.info("HTTP fetch returned %s — falling back to browser", resp.status)
+                    return None
+                html = await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.info("HTTP fetch failed (%s) — falling back to browser", e)
+            return None
+
+        page_type = self._detect_page_type(html)
+        if page_type in ("captcha", "login"):
+            logger.info("HTTP fetch hit %s page — falling back to browser", page_type)
+            return None
+
+        tank_data = self._extract_tank_data_from_html(html, user_capacity=user_capacity)
+        if not tank_data:
+            return None
+
+        await asyncio.to_thread(self._save_history, tank_data)
+        return {"success": True, "data": tank_data.to_dict()}
+
+    async def close_http(self):
+        """Close the HTTP session."""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
     def fetch_tank_data_sync(self, tank_id: str, user_capacity: float = 0) -> dict:
         """Fetch tank data from BoilerJuice (synchronous — call from a thread).
 
@@ -411,74 +925,115 @@ class BoilerJuiceScraper:
             tank_id: BoilerJuice tank ID.
             user_capacity: User-configured tank capacity in litres.
         """
-        import time
+        with self._lock:  # one navigation on the shared driver at a time
+            return self._fetch_tank_data_browser(tank_id, user_capacity)
+
+    def _fetch_tank_data_browser(self, tank_id: str, user_capacity: float) -> dict:
+        """Browser fetch — the caller holds self._lock."""
+        # Long-lived Chromium creeps up in memory; recycle it now and then
+        # (cookies are on disk and get reloaded into the new one)
+        if self._driver_fetches >= DRIVER_RECYCLE_FETCHES and not self._auth_in_progress:
+            logger.info("Recycling browser after %d fetches", self._driver_fetches)
+            self.close()
         try:
             self._ensure_driver()
+            self._driver_fetches += 1
+            self._block_heavy_assets(True)
 
             tank_url = TANK_URL_TEMPLATE.format(tank_id=tank_id)
             logger.info("Fetching tank data from %s", tank_url)
 
             self._driver.get(tank_url)
-            time.sleep(3)
-
-            html = self._driver.page_source
-            page_type = self._detect_page_type(html)
-
-            if page_type == "captcha":
-                return {
-                    "success": False,
-                    "error": "CAPTCHA required. Please re-authenticate via the web UI.",
-                    "needs_auth": True,
-                }
+            self._wait_for_tank_page()
 
-            if page_type == "login":
-                return {
-                    "success": False,
-                    "error": "Session expired. Please re-authenticate via the web UI.",
-                    "needs_auth": True,
-                }
+            page = self._read_page(classify=True)
+            blocked = self._needs_auth_result(page["page_type"])
+            if blocked:
+                return blocked
 
-            tank_data = self._extract_tank_data(user_capacity=user_capacity)
+            tank_data = self._extract_tank_data(page, user_capacity=user_capacity)
 
             if tank_data:
-                self._last_tank_data = tank_data
                 self._save_cookies()
                 self._save_history(tank_data)
                 return {"success": True, "data": tank_data.to_dict()}
 
-            # Try alternative URLs
-            for alt_url in [
+            # Try alternative URLs — fetched together from inside the page
+            # (same cookies/WAF token) rather than navigating to each in turn
+            alt_urls = [
                 f"https://www.boilerjuice.com/uk/users/tanks/{tank_id}",
                 DASHBOARD_URL,
                 MY_ACCOUNT_URL,
-            ]:
-                logger.info("Trying alternative URL: %s", alt_url)
-                self._driver.get(alt_url)
-                time.sleep(3)
-                tank_data = self._extract_tank_data(user_capacity=user_capacity)
+            ]
+            logger.info("Trying alternative URLs: %s", ", ".join(alt_urls))
+            try:
+                alt_pages = self._driver.execute_async_script(FETCH_PAGES_JS, alt_urls) or []
+            except WebDriverException as e:
+                logger.info("Alternative URL fetch failed: %s", e)
+                alt_pages = []
+            for html in alt_pages:
+                if not html:
+                    continue
+                # Bounced to CAPTCHA/login — the other URLs will have been too
+                blocked = self._needs_auth_result(self._detect_page_type(html))
+                if blocked:
+                    return blocked
+                tank_data = self._extract_tank_data_from_html(html, user_capacity=user_capacity)
                 if tank_data:
-                    self._last_tank_data = tank_data
                     self._save_cookies()
                     self._save_history(tank_data)
                     return {"success": True, "data": tank_data.to_dict()}
 
             # Last resort: return page text
-            try:
-                text = self._driver.find_element(By.TAG_NAME, "body").text
-            except Exception:
-                text = ""
             return {
                 "success": False,
                 "error": "Could not extract tank data from page.",
-                "page_text_preview": text[:500],
-                "url": self._driver.current_url,
+                "page_text_preview": page["text"][:500],
+                "url": page["url"],
             }
 
         except Exception as e:
             logger.error("Fetch tank data failed: %s", e)
             return {"success": False, "error": str(e)}
+        finally:
+            if self._driver is not None:
+                self._block_heavy_assets(False)
+                try:
+                    self._driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _needs_auth_result(page_type: str) -> Optional[dict]:
+        """The fetch result for a CAPTCHA/login page, or None for others."""
+        if page_type == "captcha":
+            return {
+                "success": False,
+                "error": "CAPTCHA required. Please re-authenticate via the web UI.",
+                "needs_auth": True,
+            }
+        if page_type == "login":
+            return {
+                "success": False,
+                "error": "Session expired. Please re-authenticate via the web UI.",
+                "needs_auth": True,
+            }
+        return None
+
+    def _read_page(self, classify: bool = False) -> dict:
+        """Read URL, data-percentage, body text (and optionally the page
+        type) in one call."""
+        page = self._driver.execute_script(
+            READ_PAGE_JS, PAGE_TYPE_SOURCES if classify else None
+        ) or {}
+        return {
+            "url": page.get("url") or "",
+            "pct": page.get("pct"),
+            "text": page.get("text") or "",
+            "page_type": page.get("page_type") or "unknown",
+        }
 
-    def _extract_tank_data(self, user_capacity: float = 0) -> Optional[TankData]:
+    def _extract_tank_data(self, page: dict, user_capacity: float = 0) -> Optional[TankData]:
         """Extract the tank fill percentage from the page, then calculate
         remaining litres from the user-configured tank capacity.
 
@@ -488,125 +1043,198 @@ class BoilerJuiceScraper:
         tank capacity in Settings and we do the simple maths:
 
             litres = capacity * percent / 100
+
+        `page` is the snapshot returned by _read_page().
         """
         try:
-            try:
-                text = self._driver.find_element(By.TAG_NAME, "body").text
-            except Exception:
-                text = ""
+            text = page["text"]
 
-            logger.info("Page URL: %s", self._driver.current_url)
+            logger.info("Page URL: %s", page["url"])
             logger.debug("Page text (first 500 chars): %s", text[:500])
 
             # ── Find percentage ───────────────────────────────────
             percent = 0.0
 
             # Method 1: data-percentage attribute (most reliable)
-            try:
-                el = self._driver.find_element(By.CSS_SELECTOR, "[data-percentage]")
-                pct = el.get_attribute("data-percentage")
-                if pct:
+            pct = page.get("pct")
+            if pct:
+                try:
                     percent = float(pct)
                     logger.info("Found percent via data-percentage attr: %s", percent)
-            except Exception:
-                pass
+                except ValueError:
+                    pass
 
             # Method 2: regex on page text
             if not percent:
-                pct_patterns = [
-                    r"(\d+(?:\.\d+)?)\s*%\s*(?:full|level|remaining)",
-                    r"(?:level|percentage|percent)[:\s]+(\d+(?:\.\d+)?)",
-                    r"(\d+(?:\.\d+)?)\s*%",
-                ]
-                for p in pct_patterns:
-                    m = re.search(p, text, re.IGNORECASE)
-                    if m:
-                        val = float(m.group(1))
-                        if 0 < val <= 100:
-                            percent = val
-                            logger.info("Found percent via regex: %s", percent)
-                            break
+                percent = self._find_percent_in_text(text)
+
+            return self._tank_data_from_percent(percent, user_capacity)
+
+        except Exception as e:
+            logger.error("Tank data extraction failed: %s", e)
+            return None
+
+    def _extract_tank_data_from_html(self, html: str, user_capacity: float = 0) -> Optional[TankData]:
+        """Same as _extract_tank_data, but works on raw page HTML (no browser)."""
+        try:
+            percent = 0.0
+
+            # Method 1: data-percentage attribute (most reliable)
+            m = DATA_PERCENTAGE_RE.search(html)
+            if m:
+                percent = float(m.group(1))
+                logger.info("Found percent via data-percentage attr: %s", percent)
 
+            # Method 2: regex on the page's visible text
             if not percent:
-                logger.warning("Could not find percentage on page")
-                return None
-
-            # ── Calculate litres from capacity ────────────────────
-            capacity = user_capacity
-            litres = round(capacity * percent / 100, 1) if capacity > 0 else 0
-
-            if capacity > 0:
-                logger.info("Calculated: %.0f L capacity x %.1f%% = %.1f L remaining",
-                            capacity, percent, litres)
-            else:
-                logger.warning("No tank capacity configured — set it in Settings "
-                               "to see Oil Remaining in litres")
-
-            # ── Level name ────────────────────────────────────────
-            if percent >= 60:
-                level_name = "High"
-            elif percent >= 30:
-                level_name = "Medium"
-            else:
-                level_name = "Low"
-
-            return TankData(
-                litres=litres,
-                percent=percent,
-                capacity=capacity,
-                level_name=level_name,
-            )
+                text = HTML_TAG_RE.sub(" ", html)
+                percent = self._find_percent_in_text(html_lib.unescape(text))
+
+            return self._tank_data_from_percent(percent, user_capacity)
 
         except Exception as e:
             logger.error("Tank data extraction failed: %s", e)
             return None
 
+    @staticmethod
+    def _find_percent_in_text(text: str) -> float:
+        """Find a plausible fill percentage in page text (0 if none)."""
+        best = None  # (rank, value) of the most preferred match so far
+        for m in PCT_RE.finditer(text[:TEXT_SCAN_LIMIT]):
+            rank = PCT_GROUPS.index(m.lastgroup)
+            if best is not None and rank >= best[0]:
+                continue
+            val = float(m.group(m.lastgroup))
+            if 0 < val <= 100:
+                best = (rank, val)
+                if rank == 0:
+                    break
+        if best is None:
+            return 0.0
+        logger.info("Found percent via regex: %s", best[1])
+        return best[1]
+
+    @staticmethod
+    def _tank_data_from_percent(percent: float, user_capacity: float) -> Optional[TankData]:
+        """Build a TankData from the scraped percentage and user capacity."""
+        if not percent:
+            logger.warning("Could not find percentage on page")
+            return None
+
+        # ── Calculate litres from capacity ────────────────────
+        capacity = user_capacity
+        litres = round(capacity * percent / 100, 1) if capacity > 0 else 0
+
+        if capacity > 0:
+            logger.info("Calculated: %.0f L capacity x %.1f%% = %.1f L remaining",
+                        capacity, percent, litres)
+        else:
+            logger.warning("No tank capacity configured — set it in Settings "
+                           "to see Oil Remaining in litres")
+
+        # ── Level name ────────────────────────────────────────
+        level_name = next(
+            (name for threshold, name in LEVEL_THRESHOLDS if percent >= threshold), "Low"
+        )
+
+        return TankData(
+            litres=litres,
+            percent=percent,
+            capacity=capacity,
+            level_name=level_name,
+        )
+
+    def _migrate_legacy_history(self):
+        """Convert the old history.json array into the JSONL format."""
+        if not os.path.exists(LEGACY_HISTORY_FILE) or os.path.exists(HISTORY_FILE):
+            return
+        try:
+            with open(LEGACY_HISTORY_FILE, "rb") as f:
+                history = _loads(f.read())
+            tmp = HISTORY_FILE + ".tmp"
+            with open(tmp, "wb") as f:
+                for entry in history[-HISTORY_MAX_ENTRIES:]:
+                    f.write(_dumps(entry) + b"\n")
+            os.replace(tmp, HISTORY_FILE)
+            os.remove(LEGACY_HISTORY_FILE)
+            logger.info("Migrated %d history readings to %s", len(history), HISTORY_FILE)
+        except Exception as e:
+            logger.error("Failed to migrate history: %s", e)
+
     def _save_history(self, tank_data: TankData):
-        """Append tank reading to history file."""
+        """Append tank reading to the in-memory history and the history file."""
+        reading = tank_data.to_dict()
+        self._history.append(reading)
         try:
             os.makedirs(DATA_DIR, exist_ok=True)
-            history = []
-            if os.path.exists(HISTORY_FILE):
-                with open(HISTORY_FILE, "r") as f:
-                    history = json.load(f)
+            line = _dumps(reading) + b"\n"
+            with open(HISTORY_FILE, "ab") as f:
+                f.write(line)
+                size = f.tell()
 
-            history.append(tank_data.to_dict())
+            if size > HISTORY_COMPACT_BYTES:
+                self._compact_history()
 
-            # Keep last 500 readings
-            if len(history) > 500:
-                history = history[-500:]
+        except Exception as e:
+            logger.error("Failed to save history: %s", e)
+
+    def _compact_history(self):
+        """Rewrite the history file keeping only the last readings."""
+        lines = self._read_history_lines(HISTORY_MAX_ENTRIES)
+        _atomic_write(HISTORY_FILE, b"\n".join(lines) + b"\n")
+        logger.info("Compacted history to %d readings", len(lines))
 
-            with open(HISTORY_FILE, "w") as f:
-                json.dump(history, f, indent=2)
+    @staticmethod
+    def _read_history_lines(limit: int) -> list:
+        """Read the last `limit` non-empty lines of the history file,
+        seeking from the end instead of reading the whole file."""
+        try:
+            with open(HISTORY_FILE, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                chunk = max(limit * 256, 4096)
+                while True:
+                    start = max(0, size - chunk)
+                    f.seek(start)
+                    lines = f.read().splitlines()
+                    if start > 0:
+                        lines = lines[1:]  # first line is probably partial
+                    lines = [line for line in lines if line.strip()]
+                    if len(lines) >= limit or start == 0:
+                        return lines[-limit:]
+                    chunk *= 2
+        except FileNotFoundError:
+            return []
+
+    def _read_history(self, limit: int) -> list:
+        """Parse the last `limit` history readings."""
+        history = []
+        for line in self._read_history_lines(limit):
+            try:
+                history.append(_loads(line))
+            except ValueError:
+                pass  # torn write from a crash — skip it
+        return history
 
+    def _load_history(self):
+        """Load recent readings from disk into memory once, at startup."""
+        try:
+            # Normalise once (older readings carry legacy keys)
+            self._history.extend(
+                TankData.from_dict(r).to_dict() for r in self._read_history(HISTORY_MAX_ENTRIES)
+            )
         except Exception as e:
-            logger.error("Failed to save history: %s", e)
+            logger.error("Failed to load history: %s", e)
 
     def get_last_data(self) -> Optional[dict]:
-        """Get the last fetched tank data."""
-        if self._last_tank_data:
-            return self._last_tank_data.to_dict()
-        try:
-            if os.path.exists(HISTORY_FILE):
-                with open(HISTORY_FILE, "r") as f:
-                    history = json.load(f)
-                if history:
-                    self._last_tank_data = TankData.from_dict(history[-1])
-                    return self._last_tank_data.to_dict()
-        except Exception:
-            pass
-        return None
+        """Get the last fetched tank data (the newest history reading)."""
+        return dict(self._history[-1]) if self._history else None
 
     def get_history(self, limit: int = 50) -> list:
-        """Get recent history readings."""
-        try:
-            if os.path.exists(HISTORY_FILE):
-                with open(HISTORY_FILE, "r") as f:
-                    history = json.load(f)
-                return history[-limit:]
-        except Exception:
-            pass
-        return []
+        """Get recent history readings (served from memory)."""
+        if limit <= 0:
+            return []
+        return [dict(entry) for entry in list(self._history)[-limit:]]
 
     @property
     def is_auth_in_progress(self) -> bool:
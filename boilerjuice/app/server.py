@@ -11,6 +11,7 @@ import logging
 import os
 import sys
 from pathlib import Path
+from typing import Optional
 
 from aiohttp import web
 
@@ -19,6 +20,7 @@ APP_DIR = Path(__file__).parent
 STATIC_DIR = APP_DIR / "static"
 sys.path.insert(0, str(APP_DIR))
 
+from mqtt import publish_tank_data_async, shutdown as mqtt_shutdown
 from scraper import BoilerJuiceScraper
 
 # ── Configuration ────────────────────────────────────────────
@@ -33,24 +35,77 @@ logging.basicConfig(
 )
 logger = logging.getLogger("boilerjuice")
 
+# ── JSON ─────────────────────────────────────────────────
+# Prefer orjson (C, returns bytes) for API responses
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads
+
+
+# Bodies smaller than this aren't worth gzipping
+COMPRESS_MIN_BYTES = 1024
+
+
+def json_response(data, status: int = 200) -> web.Response:
+    """web.json_response() equivalent that serialises with _dumps."""
+    body = _dumps(data)
+    resp = web.Response(body=body, status=status, content_type="application/json")
+    if len(body) >= COMPRESS_MIN_BYTES:
+        resp.enable_compression()  # only if the client accepts gzip/deflate
+    return resp
+
+
 # ── Global state ─────────────────────────────────────────────
 scraper = BoilerJuiceScraper()
 
 
+# Set by save_config() so the auto-refresh loop reacts straight away
+_config_changed = asyncio.Event()
+# (mtime_ns, parsed config) of the last CONFIG_FILE read
+_config_cache: tuple = (None, {})
+
+
 def load_config() -> dict:
-    if os.path.exists(CONFIG_FILE):
+    """Return the saved config, re-reading the file only when it changes."""
+    global _config_cache
+    try:
+        mtime = os.stat(CONFIG_FILE).st_mtime_ns
+    except OSError:
+        return {}
+    if mtime != _config_cache[0]:
         try:
-            with open(CONFIG_FILE, "r") as f:
-                return json.load(f)
+            with open(CONFIG_FILE, "rb") as f:
+                _config_cache = (mtime, _loads(f.read()))
         except Exception as e:
             logger.error("Failed to load config: %s", e)
-    return {}
+            return {}
+    return dict(_config_cache[1])  # callers may modify their copy
 
 
-def save_config(config: dict):
+def _write_config(config: dict):
+    """Write config.json via a temp file, so a concurrent load never sees
+    half of it (blocking — run in a thread)."""
     os.makedirs(DATA_DIR, exist_ok=True)
-    with open(CONFIG_FILE, "w") as f:
+    tmp = CONFIG_FILE + ".tmp"
+    with open(tmp, "w") as f:
         json.dump(config, f, indent=2)
+    os.replace(tmp, CONFIG_FILE)
+
+
+async def save_config(config: dict):
+    global _config_cache
+    await asyncio.to_thread(_write_config, config)
+    _config_cache = (None, {})  # next load picks up the new file
+    _config_changed.set()
     logger.info("Configuration saved")
 
 
@@ -58,26 +113,39 @@ def save_config(config: dict):
 # UI Route — inlines CSS/JS into HTML (like ClawBridge)
 # ═══════════════════════════════════════════════════════════
 
-async def handle_index(request):
-    """Serve the main UI with CSS/JS inlined for ingress compatibility."""
-    try:
+# index.html with style.css/app.js inlined, built on first request
+_index_template: Optional[str] = None
+
+
+def _get_index_template() -> str:
+    """Read the UI files once and inline the CSS and JS into the HTML."""
+    global _index_template
+    if _index_template is None:
         html = (STATIC_DIR / "index.html").read_text()
         css = (STATIC_DIR / "style.css").read_text()
         js = (STATIC_DIR / "app.js").read_text()
+
+        # Inline CSS and JS
+        html = html.replace(
+            '<link rel="stylesheet" href="static/style.css">',
+            f"<style>{css}</style>"
+        )
+        html = html.replace(
+            '<script src="static/app.js"></script>',
+            f"<script>{js}</script>"
+        )
+        _index_template = html
+    return _index_template
+
+
+async def handle_index(request):
+    """Serve the main UI with CSS/JS inlined for ingress compatibility."""
+    try:
+        html = _get_index_template()
     except FileNotFoundError as e:
         logger.error("Static file not found: %s", e)
         return web.Response(text=f"File not found: {e}", status=500)
 
-    # Inline CSS and JS
-    html = html.replace(
-        '<link rel="stylesheet" href="static/style.css">',
-        f"<style>{css}</style>"
-    )
-    html = html.replace(
-        '<script src="static/app.js"></script>',
-        f"<script>{js}</script>"
-    )
-
     # Determine base path from ingress header
     base_path = request.headers.get("X-Ingress-Path", "")
     logger.info("Serving index with base_path: %s", base_path)
@@ -88,34 +156,10 @@ async def handle_index(request):
         f'const BASE = "{base_path}";'
     )
 
-    return web.Response(text=html, content_type="text/html",
+    resp = web.Response(text=html, content_type="text/html",
                         headers={"Cache-Control": "no-store"})
-
-
-async def handle_static(request):
-    """Serve static files (fallback)."""
-    filename = request.match_info.get("filename", "")
-    filepath = STATIC_DIR / filename
-
-    if not filepath.exists():
-        return web.Response(text="Not found", status=404)
-
-    content_types = {
-        ".css": "text/css",
-        ".js": "application/javascript",
-        ".png": "image/png",
-        ".svg": "image/svg+xml",
-        ".ico": "image/x-icon",
-    }
-    ext = filepath.suffix
-    content_type = content_types.get(ext, "application/octet-stream")
-
-    if ext in (".css", ".js", ".svg"):
-        content = filepath.read_text()
-        return web.Response(text=content, content_type=content_type)
-    else:
-        content = filepath.read_bytes()
-        return web.Response(body=content, content_type=content_type)
+    resp.enable_compression()  # ~50KB of inlined CSS/JS
+    return resp
 
 
 # ═══════════════════════════════════════════════════════════
@@ -131,7 +175,7 @@ async def api_get_config(request):
     if config.get("mqtt_password"):
         masked["has_mqtt_password"] = True
     masked["success"] = True
-    return web.json_response(masked)
+    return json_response(masked)
 
 
 async def api_set_config(request):
@@ -151,12 +195,15 @@ async def api_set_config(request):
         if body.get("mqtt_password"):
             config["mqtt_password"] = body["mqtt_password"]
 
-        save_config(config)
-        return web.json_response({"success": True})
+        await save_config(config)
+        if not config.get("mqtt_enabled"):
+            # Drop the broker connection now rather than at shutdown
+            await asyncio.to_thread(mqtt_shutdown)
+        return json_response({"success": True})
 
     except Exception as e:
         logger.error("Config save error: %s", e)
-        return web.json_response({"success": False, "error": str(e)}, status=500)
+        return json_response({"success": False, "error": str(e)}, status=500)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -166,8 +213,8 @@ async def api_set_config(request):
 async def api_get_status(request):
     data = scraper.get_last_data()
     if data:
-        return web.json_response({"success": True, "data": data})
-    return web.json_response({"success": False, "error": "No data available yet"})
+        return json_response({"success": True, "data": data})
+    return json_response({"success": False, "error": "No data available yet"})
 
 
 async def api_refresh(request):
@@ -177,24 +224,23 @@ async def api_refresh(request):
     config = load_config()
     tank_id = config.get("tank_id", "")
     if not tank_id:
-        return web.json_response({"success": False, "error": "Tank ID not configured. Go to Settings."})
+        return json_response({"success": False, "error": "Tank ID not configured. Go to Settings."})
 
     user_capacity = float(config.get("tank_capacity", 0) or 0)
-    result = await run_fetch_in_thread(tank_id, user_capacity)
+    result = await scraper.fetch_tank_data(tank_id, user_capacity)
 
     if result.get("success") and config.get("mqtt_enabled"):
         try:
-            from mqtt import publish_tank_data
-            publish_tank_data(config, result["data"])
+            await publish_tank_data_async(config, result["data"])
         except Exception as e:
             logger.error("MQTT publish failed: %s", e)
 
-    return web.json_response(result)
+    return json_response(result)
 
 
 async def api_get_history(request):
     history = scraper.get_history(limit=100)
-    return web.json_response({"success": True, "history": history})
+    return json_response({"success": True, "history": history})
 
 
 # ═══════════════════════════════════════════════════════════
@@ -203,25 +249,25 @@ async def api_get_history(request):
 
 async def api_auth_start(request):
     result = await scraper.start_auth()
-    return web.json_response(result)
+    return json_response(result)
 
 
 async def api_auth_click(request):
     body = await request.json()
     result = await scraper.auth_click(body.get("x", 0), body.get("y", 0))
-    return web.json_response(result)
+    return json_response(result)
 
 
 async def api_auth_type(request):
     body = await request.json()
     result = await scraper.auth_type(body.get("text", ""))
-    return web.json_response(result)
+    return json_response(result)
 
 
 async def api_auth_key(request):
     body = await request.json()
     result = await scraper.auth_press_key(body.get("key", "Enter"))
-    return web.json_response(result)
+    return json_response(result)
 
 
 async def api_auth_fill_login(request):
@@ -230,8 +276,7 @@ async def api_auth_fill_login(request):
     password = body.get("password", "")
 
     if password == "__saved__":
-        config = load_config()
-        password = config.get("password", "")
+        password = ""
 
     if not email or not password:
         config = load_config()
@@ -239,29 +284,29 @@ async def api_auth_fill_login(request):
         password = password or config.get("password", "")
 
     if not email or not password:
-        return web.json_response({
+        return json_response({
             "success": False,
             "error": "No credentials available. Please enter them in Settings first.",
         })
 
     result = await scraper.auth_fill_login(email, password)
-    return web.json_response(result)
+    return json_response(result)
 
 
 async def api_auth_finish(request):
     await scraper.finish_auth()
-    return web.json_response({"success": True})
+    return json_response({"success": True})
 
 
 async def api_auth_screenshot(request):
-    screenshot = scraper.get_screenshot_base64()
+    screenshot = await scraper.get_screenshot_base64_async()
     if screenshot:
-        return web.json_response({"success": True, "screenshot": screenshot})
-    return web.json_response({"success": False, "error": "No screenshot available"})
+        return json_response({"success": True, "screenshot": screenshot})
+    return json_response({"success": False, "error": "No screenshot available"})
 
 
 async def api_health(request):
-    return web.json_response({
+    return json_response({
         "status": "ok",
         "auth_in_progress": scraper.is_auth_in_progress,
         "has_data": scraper.get_last_data() is not None,
@@ -272,14 +317,13 @@ async def api_health(request):
 # Background auto-refresh
 # ═══════════════════════════════════════════════════════════
 
-async def run_fetch_in_thread(tank_id: str, user_capacity: float) -> dict:
-    """Run the synchronous Selenium fetch in a thread so it doesn't block
-    the aiohttp event loop (Selenium is entirely synchronous)."""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(
-        None,  # default ThreadPoolExecutor
-        lambda: scraper.fetch_tank_data_sync(tank_id, user_capacity),
-    )
+async def _wait_for_config_change(timeout: Optional[float]):
+    """Sleep until the config is saved or `timeout` seconds pass."""
+    try:
+        await asyncio.wait_for(_config_changed.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    _config_changed.clear()
 
 
 async def auto_refresh_loop():
@@ -300,30 +344,29 @@ async def auto_refresh_loop():
             config = load_config()
             interval = config.get("refresh_interval", 60)
             if interval <= 0:
-                await asyncio.sleep(60)
+                await _wait_for_config_change(None)
                 continue
 
             tank_id = config.get("tank_id", "")
             if not tank_id:
-                await asyncio.sleep(60)
+                await _wait_for_config_change(None)
                 continue
 
             user_capacity = float(config.get("tank_capacity", 0) or 0)
             logger.info("Auto-refresh: fetching tank data")
-            result = await run_fetch_in_thread(tank_id, user_capacity)
+            result = await scraper.fetch_tank_data(tank_id, user_capacity)
 
             if result.get("success"):
                 logger.info("Auto-refresh: data fetched successfully")
                 if config.get("mqtt_enabled"):
                     try:
-                        from mqtt import publish_tank_data
-                        publish_tank_data(config, result["data"])
+                        await publish_tank_data_async(config, result["data"])
                     except Exception as e:
                         logger.error("MQTT publish failed: %s", e)
             else:
                 logger.warning("Auto-refresh failed: %s", result.get("error"))
 
-            await asyncio.sleep(interval * 60)
+            await _wait_for_config_change(interval * 60)
 
         except asyncio.CancelledError:
             break
@@ -351,6 +394,11 @@ async def on_cleanup(app):
             await task
         except asyncio.CancelledError:
             pass
+    try:
+        mqtt_shutdown()
+    except Exception as e:
+        logger.error("MQTT shutdown failed: %s", e)
+    await scraper.close_http()
     scraper.close()
 
 
@@ -374,7 +422,7 @@ def create_app():
     # UI routes
     app.router.add_get("/", handle_index)
     app.router.add_get("/index.html", handle_index)
-    app.router.add_get("/static/{filename:.+}", handle_static)
+    app.router.add_static("/static/", STATIC_DIR, show_index=False)
 
     # Config API
     app.router.add_get("/api/config", api_get_config)
@@ -404,6 +452,13 @@ def create_app():
 
 
 if __name__ == "__main__":
+    # uvloop (libuv) is a faster drop-in event loop when it's installed
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     port = int(os.environ.get("PORT", "8099"))
     app = create_app()
     web.run_app(app, host="0.0.0.0", port=port)
@@ -346,7 +346,10 @@ async function startAuth() {
 
 function updateBrowserScreenshot(base64) {
   const img = document.getElementById("browserScreenshot");
-  img.src = "data:image/png;base64," + base64;
+  const src = "data:image/jpeg;base64," + base64;
+  // Nothing changed on the remote page — skip re-decoding the same frame
+  if (img.src === src) return;
+  img.src = src;
 }
 
 async function handleBrowserClick(event) {